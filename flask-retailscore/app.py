@@ -1,6 +1,16 @@
-from flask import Flask, request, jsonify
-from utils.predictor import predict_store_success
+from flask import Flask, Response, request, jsonify, stream_with_context
+from utils.predictor import (
+    predict_store_success,
+    iter_store_success,
+    scale_store_inputs,
+    SHOP_SIZES,
+    DEFAULT_CHUNK_SIZE,
+    INCOMPLETE_DATA_ERROR
+)
+from middleware.auth import require_api_key
+import json
 import logging
+import math
 import os
 
 # =========================
@@ -12,6 +22,23 @@ app.config["JSON_SORT_KEYS"] = False
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AREA_TYPES = ["Urban", "Semi-Urban", "Rural"]
+MAX_CHUNK_SIZE = 1000
+NUMERIC_STORE_FIELDS = ["competitors", "employee_count", "stock_availability"]
+
+
+def to_number(value):
+    """
+    Strict numeric conversion for JSON inputs: rejects bools, NaN/inf
+    and anything float() cannot parse
+    """
+    if isinstance(value, bool):
+        raise ValueError("boolean is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError("number must be finite")
+    return number
+
 # =========================
 # ROUTES
 # =========================
@@ -74,6 +101,7 @@ def docs():
             "/api/predict": {
                 "post": {
                     "summary": "Predict store success",
+                    "security": [{"ApiKeyAuth": []}],
                     "description": "Predicts retail store success score based on location demographics and store characteristics",
                     "requestBody": {
                         "required": True,
@@ -116,6 +144,46 @@ def docs():
                                 }
                             }
                         },
+                        "422": {
+                            "description": "Pincode exists but its demographic data is incomplete",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "401": {
+                            "description": "Missing or invalid X-API-Key header",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "429": {
+                            "description": "API key rate limit exceeded, retry after the Retry-After interval",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "503": {
+                            "description": "Service overloaded, retry after the Retry-After interval",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
                         "500": {
                             "description": "Internal server error",
                             "content": {
@@ -128,9 +196,85 @@ def docs():
                         }
                     }
                 }
+            },
+            "/api/predict/stream": {
+                "post": {
+                    "summary": "Stream predictions for many locations",
+                    "security": [{"ApiKeyAuth": []}],
+                    "description": "Scores every pincode of an area type (optionally filtered by pincode prefix) with the given store characteristics and streams results as newline-delimited JSON. Each line is a prediction result; the last line is {\"status\": \"complete\", \"count\": N, \"skipped\": M} where skipped counts pincodes left out for incomplete demographic data, or an error object if scoring failed mid-stream",
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "$ref": "#/components/schemas/PredictStreamRequest"
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "Stream of prediction results",
+                            "content": {
+                                "application/x-ndjson": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/PredictResult"
+                                    }
+                                }
+                            }
+                        },
+                        "400": {
+                            "description": "Missing or invalid field",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "401": {
+                            "description": "Missing or invalid X-API-Key header",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "429": {
+                            "description": "API key rate limit exceeded, retry after the Retry-After interval",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        },
+                        "503": {
+                            "description": "Service overloaded, retry after the Retry-After interval",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "$ref": "#/components/schemas/ErrorResponse"
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
             }
         },
         "components": {
+            "securitySchemes": {
+                "ApiKeyAuth": {
+                    "type": "apiKey",
+                    "in": "header",
+                    "name": "X-API-Key"
+                }
+            },
             "schemas": {
                 "PredictRequest": {
                     "type": "object",
@@ -186,28 +330,80 @@ def docs():
                             "example": "success"
                         },
                         "result": {
-                            "type": "object",
-                            "properties": {
-                                "pincode": {
-                                    "type": "integer",
-                                    "description": "Input pincode"
-                                },
-                                "area_type": {
+                            "$ref": "#/components/schemas/PredictResult"
+                        }
+                    }
+                },
+                "PredictResult": {
+                    "type": "object",
+                    "properties": {
+                        "pincode": {
+                            "type": "integer",
+                            "description": "Input pincode"
+                        },
+                        "area_type": {
+                            "type": "string",
+                            "description": "Input area type"
+                        },
+                        "market_score": {
+                            "type": "number",
+                            "description": "Normalized market potential score (0-1)"
+                        },
+                        "store_score": {
+                            "type": "number",
+                            "description": "Business viability score (0-1000)"
+                        },
+                        "demographics": {
+                            "$ref": "#/components/schemas/Demographics"
+                        }
+                    }
+                },
+                "PredictStreamRequest": {
+                    "type": "object",
+                    "required": [
+                        "area_type",
+                        "competitors",
+                        "employee_count",
+                        "stock_availability",
+                        "shoe_size"
+                    ],
+                    "properties": {
+                        "area_type": {
+                            "type": "string",
+                            "description": "Area type to score; every pincode of this type is included",
+                            "enum": ["Urban", "Semi-Urban", "Rural"]
+                        },
+                        "pincode_prefix": {
+                            "type": "string",
+                            "description": "Only score pincodes starting with this prefix (e.g. postal circle)"
+                        },
+                        "chunk_size": {
+                            "type": "integer",
+                            "description": "Locations scored and sent per chunk (1-1000, default 100)"
+                        },
+                        "competitors": {
+                            "type": "integer",
+                            "description": "Number of competing stores"
+                        },
+                        "employee_count": {
+                            "type": "integer",
+                            "description": "Number of employees in the store"
+                        },
+                        "stock_availability": {
+                            "type": "integer",
+                            "description": "Stock availability score"
+                        },
+                        "shoe_size": {
+                            "oneOf": [
+                                {
                                     "type": "string",
-                                    "description": "Input area type"
-                                },
-                                "market_score": {
-                                    "type": "number",
-                                    "description": "Normalized market potential score (0-1)"
-                                },
-                                "store_score": {
-                                    "type": "number",
-                                    "description": "Business viability score (0-1000)"
+                                    "enum": ["Small", "Medium", "Large"]
                                 },
-                                "demographics": {
-                                    "$ref": "#/components/schemas/Demographics"
+                                {
+                                    "type": "integer"
                                 }
-                            }
+                            ],
+                            "description": "Shoe size category or numeric value"
                         }
                     }
                 },
@@ -237,6 +433,14 @@ def docs():
                         "coordinates": {
                             "type": "string",
                             "description": "GPS coordinates (latitude, longitude)"
+                        },
+                        "latitude": {
+                            "type": "number",
+                            "description": "Latitude in decimal degrees"
+                        },
+                        "longitude": {
+                            "type": "number",
+                            "description": "Longitude in decimal degrees"
                         }
                     }
                 },
@@ -257,6 +461,7 @@ def docs():
 
 
 @app.route("/api/predict", methods=["POST"])
+@require_api_key
 def predict():
     try:
         data = request.get_json(force=True)
@@ -277,7 +482,8 @@ def predict():
         result = predict_store_success(data)
 
         if "error" in result:
-            return jsonify(result), 404
+            status = 422 if result["error"] == INCOMPLETE_DATA_ERROR else 404
+            return jsonify(result), status
 
         return jsonify({
             "status": "success",
@@ -288,6 +494,97 @@ def predict():
         logger.exception("Prediction failed")
         return jsonify({"error": "Internal server error"}), 500
 
+
+@app.route("/api/predict/stream", methods=["POST"])
+@require_api_key(streaming=True)
+def predict_stream():
+    """
+    Scores every pincode of an area type (optionally one pincode prefix)
+    and streams the results as newline-delimited JSON, one chunk at a time
+    """
+    try:
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+
+        required_fields = [
+            "area_type",
+            "competitors",
+            "employee_count",
+            "stock_availability",
+            "shoe_size"
+        ]
+
+        for field in required_fields:
+            if field not in data:
+                return jsonify({"error": f"Missing field: {field}"}), 400
+
+        if data["area_type"] not in AREA_TYPES:
+            return jsonify({"error": f"Invalid area_type: {data['area_type']}"}), 400
+
+        chunk_size_error = f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}"
+        chunk_size = data.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        if isinstance(chunk_size, bool):
+            return jsonify({"error": chunk_size_error}), 400
+        try:
+            chunk_size = int(chunk_size)
+        except (TypeError, ValueError):
+            return jsonify({"error": chunk_size_error}), 400
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            return jsonify({"error": chunk_size_error}), 400
+
+        # Validate store inputs before the 200 status is sent; errors
+        # inside the stream can no longer change the status code
+        inputs = dict(data)
+        for field in NUMERIC_STORE_FIELDS:
+            try:
+                inputs[field] = to_number(data[field])
+            except (TypeError, ValueError):
+                return jsonify({"error": f"{field} must be a number"}), 400
+        shoe_size_error = f"shoe_size must be {', '.join(SHOP_SIZES)} or a number"
+        if isinstance(data["shoe_size"], str):
+            if data["shoe_size"] not in SHOP_SIZES:
+                return jsonify({"error": shoe_size_error}), 400
+        else:
+            try:
+                inputs["shoe_size"] = to_number(data["shoe_size"])
+            except (TypeError, ValueError):
+                return jsonify({"error": shoe_size_error}), 400
+
+        scaled_store_features = scale_store_inputs(inputs)
+
+    except Exception:
+        logger.exception("Streaming prediction failed")
+        return jsonify({"error": "Internal server error"}), 500
+
+    def generate():
+        count = 0
+        skipped = 0
+        try:
+            # One chunk is scored per write; the WSGI server only asks for
+            # the next one once the previous write went out, and closes the
+            # generator when the client disconnects
+            for results, chunk_skipped in iter_store_success(inputs, scaled_store_features, chunk_size):
+                count += len(results)
+                skipped += chunk_skipped
+                yield "".join(json.dumps(result) + "\n" for result in results)
+
+            yield json.dumps({"status": "complete", "count": count, "skipped": skipped}) + "\n"
+
+        except GeneratorExit:
+            logger.info(f"Client disconnected after {count} streamed results")
+            raise
+
+        except Exception:
+            logger.exception("Streaming prediction failed")
+            yield json.dumps({"error": "Internal server error", "count": count, "skipped": skipped}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
 # =========================
 # ENTRY POINT
 # =========================
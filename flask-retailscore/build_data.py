@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Build the typed retail data artifact from the source spreadsheet.
+
+Streams data/retail_data_with_area_type.xlsx row by row (openpyxl
+read-only mode), parses population density and coordinates into numeric
+columns, rejects malformed and duplicate pincodes, and writes a
+compressed columnar numpy archive plus a manifest holding its SHA-256
+content hash. utils/predictor.py loads the archive directly and checks
+the hash, so nothing is re-parsed at runtime.
+
+Build-time dependency: openpyxl (not needed by the service itself),
+install with `pip install -r requirements-dev.txt`.
+
+Usage:
+    python build_data.py
+    python build_data.py --strict   # fail if any row is rejected
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+from openpyxl import load_workbook
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_DIR, "data", "retail_data_with_area_type.xlsx")
+ARTIFACT_PATH = os.path.join(BASE_DIR, "data", "retail_data.npz")
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "retail_data.manifest.json")
+
+FORMAT_VERSION = 1
+
+PINCODE_RE = re.compile(r"^[1-9]\d{5}$")
+DENSITY_RE = re.compile(r"^\s*([\d,]+(?:\.\d+)?)\s*(?:per\s+sq\s*km)?\s*$", re.IGNORECASE)
+COORDINATES_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Source column -> (artifact column, dtype)
+INT_COLUMNS = {
+    "total_population": "total_population",
+    "male_population": "male_population",
+    "female_population": "female_population",
+    "Competitors": "competitors",
+    "employee_count": "employee_count",
+    "Stoks availabity": "stock_availability",
+}
+TEXT_COLUMNS = {
+    "places": "places",
+    "shop_size": "shop_size",
+    "area_type": "area_type",
+}
+
+# Rows outside these values never match an area_type query
+AREA_TYPES = {"Urban", "Semi-Urban", "Rural"}
+
+# Missing integers are stored as this sentinel so columns stay int64
+MISSING_INT = -1
+
+MAX_EXAMPLES = 5
+
+
+# =========================
+# PARSERS
+# =========================
+def parse_pincode(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip() if value is not None else ""
+    if not PINCODE_RE.match(text):
+        return None
+    return int(text)
+
+
+def parse_density(value):
+    """
+    "340 per sq km" / "1,200" / 340 -> 340.0, anything else -> None
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = DENSITY_RE.match(str(value or ""))
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
+
+
+def parse_coordinates(value):
+    """
+    "16.968425, 81.446589" -> (16.968425, 81.446589), invalid -> None
+    """
+    match = COORDINATES_RE.match(str(value or ""))
+    if not match:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def parse_int(value):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not number.is_integer():
+        return None
+    return int(number)
+
+
+# =========================
+# BUILD
+# =========================
+class BuildReport:
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rejected = {"malformed_pincode": [], "duplicate_pincode": []}
+        self.missing = {}
+
+    def reject(self, reason, row_number, value):
+        self.rejected[reason].append((row_number, value))
+
+    def note_missing(self, column, row_number, pincode):
+        self.missing.setdefault(column, []).append((row_number, pincode))
+
+    @property
+    def rejected_count(self):
+        return sum(len(items) for items in self.rejected.values())
+
+    def summary(self):
+        return {
+            "rows_read": self.rows_read,
+            "rows_written": self.rows_written,
+            "rejected": {reason: len(items) for reason, items in self.rejected.items()},
+            "missing": {column: len(items) for column, items in self.missing.items()},
+        }
+
+    def print(self):
+        print(f"  - Rows read: {self.rows_read}")
+        print(f"  - Rows written: {self.rows_written}")
+        for reason, items in self.rejected.items():
+            if items:
+                examples = ", ".join(f"row {row} ({value!r})" for row, value in items[:MAX_EXAMPLES])
+                print(f"  ! Rejected {len(items)} {reason.replace('_', ' ')}: {examples}")
+        for column, items in self.missing.items():
+            examples = ", ".join(f"row {row} ({pincode})" for row, pincode in items[:MAX_EXAMPLES])
+            print(f"  ! {len(items)} rows with missing/malformed {column}: {examples}")
+
+
+def stream_rows(path):
+    """
+    Yield (row_number, {header: value}) without loading the whole workbook
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else "" for name in next(rows)]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def build_columns(rows, report):
+    columns = {name: [] for name in ["pincode", "latitude", "longitude", "population_density"]}
+    columns.update({name: [] for name in INT_COLUMNS.values()})
+    columns.update({name: [] for name in TEXT_COLUMNS.values()})
+    seen = set()
+
+    for row_number, row in rows:
+        report.rows_read += 1
+
+        pincode = parse_pincode(row.get("pincode"))
+        if pincode is None:
+            report.reject("malformed_pincode", row_number, row.get("pincode"))
+            continue
+        if pincode in seen:
+            report.reject("duplicate_pincode", row_number, pincode)
+            continue
+        seen.add(pincode)
+
+        density = parse_density(row.get("population_density"))
+        if density is None:
+            report.note_missing("population_density", row_number, pincode)
+            density = np.nan
+
+        coordinates = parse_coordinates(row.get("coordinates"))
+        if coordinates is None:
+            report.note_missing("coordinates", row_number, pincode)
+            coordinates = (np.nan, np.nan)
+
+        columns["pincode"].append(pincode)
+        columns["population_density"].append(density)
+        columns["latitude"].append(coordinates[0])
+        columns["longitude"].append(coordinates[1])
+
+        for source, target in INT_COLUMNS.items():
+            value = parse_int(row.get(source))
+            if value is None:
+                report.note_missing(target, row_number, pincode)
+                value = MISSING_INT
+            columns[target].append(value)
+
+        for source, target in TEXT_COLUMNS.items():
+            value = row.get(source)
+            value = str(value).strip() if value is not None else ""
+            if not value or (target == "area_type" and value not in AREA_TYPES):
+                report.note_missing(target, row_number, pincode)
+            columns[target].append(value)
+
+        report.rows_written += 1
+
+    arrays = {
+        "pincode": np.asarray(columns["pincode"], dtype=np.int64),
+        "latitude": np.asarray(columns["latitude"], dtype=np.float64),
+        "longitude": np.asarray(columns["longitude"], dtype=np.float64),
+        "population_density": np.asarray(columns["population_density"], dtype=np.float64),
+    }
+    for name in INT_COLUMNS.values():
+        arrays[name] = np.asarray(columns[name], dtype=np.int64)
+    for name in TEXT_COLUMNS.values():
+        arrays[name] = np.asarray(columns[name], dtype=np.str_)
+    return arrays
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if any row is rejected")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = BuildReport()
+
+    print(f"Streaming {os.path.relpath(args.source)}...")
+    arrays = build_columns(stream_rows(args.source), report)
+
+    if args.strict and report.rejected_count:
+        report.print()
+        print(f"✗ {report.rejected_count} rows rejected, not writing artifact (--strict)")
+        sys.exit(1)
+
+    # savez_compressed appends .npz when missing, so write via a file handle
+    with open(args.output, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+    content_hash = file_sha256(args.output)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "artifact": os.path.basename(args.output),
+        "sha256": content_hash,
+        "rows": report.rows_written,
+        "columns": {name: str(array.dtype) for name, array in arrays.items()},
+        "missing_int_sentinel": MISSING_INT,
+        "report": report.summary(),
+    }
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+    elapsed = time.perf_counter() - started
+    source_size = os.path.getsize(args.source)
+    artifact_size = os.path.getsize(args.output)
+
+    print("✓ Build complete!")
+    report.print()
+    print(f"  - Columns: {len(arrays)}")
+    print(f"  - Build time: {elapsed:.2f}s")
+    print(f"  - Source size: {source_size / 1024:.1f} KiB")
+    print(f"  - Artifact size: {artifact_size / 1024:.1f} KiB")
+    print(f"  - SHA-256: {content_hash}")
+    print(f"  - Output: {os.path.relpath(args.output)}, {os.path.relpath(args.manifest)}")
+
+
+if __name__ == "__main__":
+    main()
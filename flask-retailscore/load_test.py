@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Local load generator for the prediction API.
+
+Fires concurrent POST /api/predict requests at a running server and
+reports the status code mix and latency percentiles, so rate limiting
+(429) and load shedding (503) can be checked under overload.
+
+Start a local server the same way the Procfile does. One gthread
+worker with more threads (16) than MAX_CONCURRENT_REQUESTS +
+MAX_QUEUED_REQUESTS (4 + 8) means excess requests reach the shedder
+and get a 503, instead of waiting in gunicorn's backlog:
+
+    API_KEYS="load-key:5:10,bulk-key:1000" \
+        gunicorn app:app --worker-class gthread --threads 16 --bind 127.0.0.1:5000
+
+Usage:
+    # Per-key quota: load-key allows 5 req/s (burst 10), expect mostly 429
+    python load_test.py --api-key load-key --concurrency 4 --duration 10
+
+    # Overload: bulk-key has a large quota, expect 503s and a bounded p99
+    python load_test.py --api-key bulk-key --concurrency 64 --duration 30
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+SAMPLE_PAYLOAD = {
+    "pincode": 534411,
+    "area_type": "Urban",
+    "competitors": 2,
+    "employee_count": 29,
+    "stock_availability": 636,
+    "shoe_size": "Small"
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def send_request(url, body, headers, timeout):
+    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except Exception:
+        status = "error"
+    return status, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--path", default="/api/predict")
+    parser.add_argument("--api-key", default=None, help="Sent as X-API-Key (required by /api/predict)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="Total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Run for N seconds instead")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") + args.path
+    body = json.dumps(SAMPLE_PAYLOAD).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if args.api_key:
+        headers["X-API-Key"] = args.api_key
+
+    statuses = Counter()
+    latencies = {}
+    lock = threading.Lock()
+    remaining = [args.requests]
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def worker():
+        while True:
+            with lock:
+                if deadline is None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+
+            status, elapsed_ms = send_request(url, body, headers, args.timeout)
+            with lock:
+                statuses[status] += 1
+                latencies.setdefault(status, []).append(elapsed_ms)
+
+    print(f"Load testing {url} with {args.concurrency} workers...")
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    print(f"✓ {total} requests in {wall:.2f}s ({total / wall if wall else 0:.1f} req/s)")
+    for status in sorted(latencies, key=str):
+        values = sorted(latencies[status])
+        print(
+            f"  - {status}: {len(values)} "
+            f"(p50 {percentile(values, 50):.1f} ms, "
+            f"p95 {percentile(values, 95):.1f} ms, "
+            f"p99 {percentile(values, 99):.1f} ms)"
+        )
+
+    all_values = sorted(v for values in latencies.values() for v in values)
+    print(
+        f"  - overall: p50 {percentile(all_values, 50):.1f} ms, "
+        f"p95 {percentile(all_values, 95):.1f} ms, "
+        f"p99 {percentile(all_values, 99):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
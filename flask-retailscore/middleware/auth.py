@@ -2,7 +2,35 @@
 Flask API Key Authentication Middleware
 
 This middleware validates API keys sent in the X-API-Key header
-to secure the Flask ML prediction service.
+to secure the Flask ML prediction service. Each key gets its own
+token-bucket quota, and a process-wide load shedder rejects requests
+early (429/503) once the ONNX path is saturated, so latency stays
+bounded under overload instead of every request queueing up.
+
+Configuration (environment variables, read once at import so a bad
+value fails at startup rather than on every request):
+    API_KEYS                 Comma separated list of keys. Each entry is
+                             "key" or "key:rate" or "key:rate:burst",
+                             where rate is requests/second. Keys
+                             therefore must not contain "," or ":".
+    API_KEY                  Legacy single key, still honoured.
+                             At least one of API_KEYS / API_KEY must be
+                             set, otherwise every protected request is 401.
+    RATE_LIMIT_PER_SECOND    Default per-key rate (default: 10)
+    RATE_LIMIT_BURST         Default per-key burst (default: 20)
+    MAX_CONCURRENT_REQUESTS  Requests allowed in flight (default: 4)
+    MAX_QUEUED_REQUESTS      Requests allowed to wait for a slot (default: 8)
+    QUEUE_TIMEOUT_SECONDS    Max wait for a slot before 503 (default: 0.5)
+    MAX_CONCURRENT_STREAMS   Streamed responses allowed at once, with no
+                             queue (default: 2). Streams use their own
+                             slots, held until the stream closes, so slow
+                             readers cannot starve regular requests.
+
+Limits are kept in process memory. They hold for one gunicorn worker
+(the Procfile setup), but every extra worker or serverless instance
+(e.g. Vercel) gets its own buckets and slots, so quotas and shedding
+are not enforced across them. Sharing limits would need an external
+store such as Redis.
 
 Usage:
     from middleware.auth import require_api_key
@@ -15,19 +43,383 @@ Usage:
 """
 
 from functools import wraps
-from flask import request, jsonify
+from flask import Response, request, jsonify
+import hashlib
+import hmac
+import logging
+import math
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# KEY REGISTRY
+# =========================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used for per-key rate limiting
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens=1.0):
+        """
+        Try to take tokens from the bucket
+
+        Returns:
+            0.0 if the tokens were taken, otherwise the number of
+            seconds until enough tokens will be available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+
+            if self.rate <= 0:
+                return math.inf
+            return (tokens - self._tokens) / self.rate
+
+
+class KeyRegistry:
+    """
+    Registry of valid API keys and their rate limiters
+
+    Keys are stored as SHA-256 digests and compared with
+    hmac.compare_digest, so lookups run in constant time regardless
+    of how much of a presented key matches.
+    """
+
+    def __init__(self, entries):
+        self._buckets = {}
+        for key, rate, burst in entries:
+            self._buckets[self._digest(key)] = TokenBucket(rate, burst)
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha256(key.encode("utf-8")).digest()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def lookup(self, api_key):
+        """
+        Return the TokenBucket for a key, or None if the key is unknown
+        """
+        presented = self._digest(api_key)
+        match = None
+        # Compare against every key so timing does not depend on position
+        for digest, bucket in self._buckets.items():
+            if hmac.compare_digest(presented, digest):
+                match = bucket
+        return match
+
+
+def parse_api_keys(raw_keys, legacy_key=None, default_rate=10.0, default_burst=20.0):
+    """
+    Parse the API_KEYS value into (key, rate, burst) tuples
+
+    Args:
+        raw_keys: Comma separated "key[:rate[:burst]]" entries
+        legacy_key: Value of the single-key API_KEY variable
+        default_rate: Rate used when an entry does not specify one
+        default_burst: Burst used when an entry does not specify one
+
+    Returns:
+        List of (key, rate, burst) tuples
+
+    Raises:
+        ValueError: If an entry has more than three fields (e.g. a key
+            containing ":"), an empty key, or a non-numeric or negative
+            rate/burst. Entries are identified by position, never by key.
+    """
+    entries = []
+    for position, item in enumerate((raw_keys or "").split(","), start=1):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(":")
+        if len(parts) > 3:
+            raise ValueError(f"API_KEYS entry {position} has more than 3 ':' fields (keys must not contain ':')")
+        key = parts[0].strip()
+        if not key:
+            raise ValueError(f"API_KEYS entry {position} has an empty key")
+        try:
+            rate = float(parts[1]) if len(parts) > 1 and parts[1] else default_rate
+            burst = float(parts[2]) if len(parts) > 2 and parts[2] else max(default_burst, rate)
+        except ValueError:
+            raise ValueError(f"API_KEYS entry {position} has a non-numeric rate or burst") from None
+        if rate < 0 or burst < 1:
+            raise ValueError(f"API_KEYS entry {position} needs rate >= 0 and burst >= 1")
+        entries.append((key, rate, burst))
+
+    if legacy_key and legacy_key not in {key for key, _, _ in entries}:
+        entries.append((legacy_key, default_rate, default_burst))
+
+    return entries
+
+
+# =========================
+# LOAD SHEDDING
+# =========================
+
+class LoadShedder:
+    """
+    Bounds the number of in-flight and waiting requests
+
+    A request first tries to take one of max_concurrent slots. If none
+    is free it may wait (up to queue_timeout seconds) only while fewer
+    than max_queued requests are already waiting; otherwise it is shed
+    immediately.
+
+    Args:
+        max_concurrent: Requests allowed to execute at once
+        max_queued: Requests allowed to wait for a slot
+        queue_timeout: Seconds a queued request waits before being shed
+    """
+
+    def __init__(self, max_concurrent, max_queued, queue_timeout):
+        self.max_concurrent = int(max_concurrent)
+        self.max_queued = int(max_queued)
+        self.queue_timeout = float(queue_timeout)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def acquire(self):
+        """
+        Try to take an execution slot
+
+        Returns:
+            True if a slot was acquired (caller must call release()),
+            False if the request should be shed
+        """
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._lock:
+            if self._waiting >= self.max_queued:
+                return False
+            self._waiting += 1
+
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self):
+        self._slots.release()
+
+
+_registry = None
+_shedder = None
+_stream_shedder = None
+
+
+def _env_number(name, default, cast, minimum):
+    """
+    Read a numeric environment variable, failing fast on bad values
+
+    Raises:
+        ValueError: If the value is not a number or is below minimum
+    """
+    raw = os.getenv(name, default)
+    try:
+        value = cast(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {raw!r}") from None
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {raw!r}")
+    return value
+
+
+def load_limits():
+    """
+    (Re)build the process-wide key registry and load shedder from the
+    environment. Runs at import so misconfiguration fails at startup;
+    call again after changing the environment (e.g. in tests).
+
+    Raises:
+        ValueError: If API_KEYS or a limit variable is malformed
+    """
+    global _registry, _shedder, _stream_shedder
+    registry = KeyRegistry(parse_api_keys(
+        os.getenv('API_KEYS'),
+        legacy_key=os.getenv('API_KEY'),
+        default_rate=_env_number('RATE_LIMIT_PER_SECOND', 10, float, 0),
+        default_burst=_env_number('RATE_LIMIT_BURST', 20, float, 1)
+    ))
+    shedder = LoadShedder(
+        max_concurrent=_env_number('MAX_CONCURRENT_REQUESTS', 4, int, 1),
+        max_queued=_env_number('MAX_QUEUED_REQUESTS', 8, int, 0),
+        queue_timeout=_env_number('QUEUE_TIMEOUT_SECONDS', 0.5, float, 0)
+    )
+    stream_shedder = LoadShedder(
+        max_concurrent=_env_number('MAX_CONCURRENT_STREAMS', 2, int, 1),
+        max_queued=0,
+        queue_timeout=0
+    )
+
+    if not len(registry):
+        logger.warning("No API keys configured (set API_KEYS or API_KEY); protected endpoints will return 401")
+
+    _registry, _shedder, _stream_shedder = registry, shedder, stream_shedder
+
+
+def get_key_registry():
+    """
+    Return the process-wide KeyRegistry
+    """
+    return _registry
+
+
+def get_load_shedder(streaming=False):
+    """
+    Return the process-wide LoadShedder, or the separate one for
+    streamed responses
+    """
+    return _stream_shedder if streaming else _shedder
+
+
+load_limits()
+
+
+# =========================
+# RESPONSES
+# =========================
+
+def _rate_limited_response(retry_after):
+    response = jsonify({
+        'error': 'Rate limit exceeded',
+        'message': 'Too many requests for this API key'
+    })
+    if math.isfinite(retry_after):
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+def _overloaded_response():
+    response = jsonify({
+        'error': 'Service overloaded',
+        'message': 'Server is at capacity, please retry shortly'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def _authenticate(api_key):
+    """
+    Look up the caller's key without charging its quota
+
+    Returns:
+        (bucket, None) for a known key, otherwise (None, error response)
+    """
+    if not api_key:
+        return None, (jsonify({
+            'error': 'Missing API key',
+            'message': 'Include X-API-Key header in your request'
+        }), 401)
+
+    bucket = get_key_registry().lookup(api_key)
+    if bucket is None:
+        logger.warning(f"Invalid API key attempt from {request.remote_addr}")
+
+        return None, (jsonify({
+            'error': 'Invalid API key',
+            'message': 'The provided API key is not valid'
+        }), 401)
+
+    return bucket, None
+
+
+def _acquire_slot(shedder):
+    if shedder.acquire():
+        return True
+    # Debug level: this fires for every shed request during overload
+    logger.debug(f"Shedding request to {request.path} ({shedder.waiting} queued)")
+    return False
+
+
+def _call_holding_slot(shedder, f, args, kwargs, streaming):
+    """
+    Run a view that already holds a shedder slot and release the slot
+    when it is done
+    """
+    try:
+        response = f(*args, **kwargs)
+    except BaseException:
+        shedder.release()
+        raise
+
+    # Streaming responses keep working after the view returns, so
+    # hold the (stream) slot until the response is closed
+    if streaming and isinstance(response, Response) and response.is_streamed:
+        response.call_on_close(shedder.release)
+    else:
+        shedder.release()
+    return response
+
+
+# =========================
+# DECORATORS
+# =========================
+
+def shed_load(f=None, *, streaming=False):
+    """
+    Decorator that rejects requests with 503 once the service is saturated
+
+    Can be used on its own for endpoints that are not key-protected.
+    Use @shed_load(streaming=True) on endpoints returning streamed
+    responses: they take a stream slot held until the stream is closed.
+    """
+    if f is None:
+        return lambda view: shed_load(view, streaming=streaming)
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        shedder = get_load_shedder(streaming)
+        if not _acquire_slot(shedder):
+            return _overloaded_response()
+
+        return _call_holding_slot(shedder, f, args, kwargs, streaming)
+
+    return decorated_function
 
 
-def require_api_key(f):
+def require_api_key(f=None, *, streaming=False):
     """
     Decorator to require API key authentication for Flask endpoints
 
     The decorator checks for X-API-Key header and validates it against
-    the API_KEY environment variable.
+    the configured key registry, sheds load when the service is
+    saturated (503) and applies the key's rate limit (429). The slot is
+    taken before the quota is charged, so shed requests cost no tokens.
 
     Args:
         f: The Flask view function to protect
+        streaming: Use the stream slots (see shed_load) instead of the
+            regular ones; use as @require_api_key(streaming=True)
 
     Returns:
         The wrapped function with API key validation
@@ -38,33 +430,26 @@ def require_api_key(f):
         def predict():
             return jsonify({'result': 'success'})
     """
+    if f is None:
+        return lambda view: require_api_key(view, streaming=streaming)
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get API key from request headers
-        api_key = request.headers.get('X-API-Key')
-
-        # Get expected API key from environment
-        expected_key = os.getenv('API_KEY')
+        bucket, error_response = _authenticate(request.headers.get('X-API-Key'))
+        if error_response is not None:
+            return error_response
 
-        # Check if API key is provided
-        if not api_key:
-            return jsonify({
-                'error': 'Missing API key',
-                'message': 'Include X-API-Key header in your request'
-            }), 401
+        shedder = get_load_shedder(streaming)
+        if not _acquire_slot(shedder):
+            return _overloaded_response()
 
-        # Validate API key
-        if api_key != expected_key:
-            # Log failed attempt (optional - add logging if needed)
-            print(f"[Auth] Invalid API key attempt from {request.remote_addr}")
+        retry_after = bucket.consume()
+        if retry_after > 0:
+            shedder.release()
+            return _rate_limited_response(retry_after)
 
-            return jsonify({
-                'error': 'Invalid API key',
-                'message': 'The provided API key is not valid'
-            }), 401
-
-        # API key is valid, proceed with the request
-        return f(*args, **kwargs)
+        # API key is valid and within quota, proceed with the request
+        return _call_holding_slot(shedder, f, args, kwargs, streaming)
 
     return decorated_function
 
@@ -77,19 +462,23 @@ def validate_api_key_middleware():
         app.before_request(validate_api_key_middleware)
 
     Note: This will apply to ALL routes. For selective protection,
-    use the @require_api_key decorator instead.
+    use the @require_api_key decorator instead. This hook enforces
+    keys and per-key rate limits only; combine it with @shed_load on
+    expensive endpoints for load shedding.
     """
     # Skip validation for health check endpoint
     if request.path == '/' or request.path == '/health':
         return None
 
-    api_key = request.headers.get('X-API-Key')
-    expected_key = os.getenv('API_KEY')
-
-    if not api_key or api_key != expected_key:
+    bucket, error_response = _authenticate(request.headers.get('X-API-Key'))
+    if error_response is not None:
         return jsonify({
             'error': 'Unauthorized',
             'message': 'Valid API key required'
         }), 401
 
+    retry_after = bucket.consume()
+    if retry_after > 0:
+        return _rate_limited_response(retry_after)
+
     return None
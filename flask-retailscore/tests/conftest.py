@@ -0,0 +1,27 @@
+import os
+import sys
+
+# Tests import the service modules the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import middleware.auth as auth
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """
+    Rebuild the auth registry/shedders from a patched environment, and
+    from the real one again afterwards
+    """
+    def configure(**env):
+        for name in ("API_KEYS", "API_KEY"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        auth.load_limits()
+
+    yield configure
+    monkeypatch.undo()
+    auth.load_limits()
@@ -0,0 +1,199 @@
+import math
+import threading
+
+import pytest
+from flask import Flask, jsonify
+
+import middleware.auth as auth
+from middleware.auth import (
+    KeyRegistry,
+    LoadShedder,
+    TokenBucket,
+    parse_api_keys,
+    require_api_key,
+)
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/protected")
+    @require_api_key
+    def protected():
+        return jsonify({"ok": True})
+
+    return app.test_client()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# =========================
+# TOKEN BUCKET
+# =========================
+def test_token_bucket_allows_burst_then_reports_wait(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    bucket = TokenBucket(rate=2, burst=3)
+
+    assert [bucket.consume() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.consume() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_burst(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.consume()
+
+    clock.now += 0.5
+    assert bucket.consume() == 0.0
+    assert bucket.consume() > 0
+
+    clock.now += 60
+    assert [bucket.consume() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.consume() > 0
+
+
+def test_token_bucket_zero_rate_never_refills(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    bucket = TokenBucket(rate=0, burst=1)
+
+    assert bucket.consume() == 0.0
+    clock.now += 3600
+    assert math.isinf(bucket.consume())
+
+
+# =========================
+# KEY PARSING / REGISTRY
+# =========================
+def test_parse_api_keys_defaults_and_overrides():
+    entries = parse_api_keys(" a , b:5 ,, c:1:3 ", default_rate=10, default_burst=20)
+
+    assert entries == [("a", 10, 20), ("b", 5.0, 20), ("c", 1.0, 3.0)]
+
+
+def test_parse_api_keys_burst_defaults_to_at_least_rate():
+    assert parse_api_keys("a:50", default_rate=10, default_burst=20) == [("a", 50.0, 50.0)]
+
+
+def test_parse_api_keys_adds_legacy_key_once():
+    assert parse_api_keys("a", legacy_key="legacy") == [("a", 10.0, 20.0), ("legacy", 10.0, 20.0)]
+    assert parse_api_keys("legacy:1", legacy_key="legacy") == [("legacy", 1.0, 20.0)]
+    assert parse_api_keys(None, legacy_key=None) == []
+
+
+@pytest.mark.parametrize("raw", ["a:1:2:3", ":5", "a:x", "a:1:y", "a:-1", "a:1:0"])
+def test_parse_api_keys_rejects_malformed_entries(raw):
+    with pytest.raises(ValueError) as excinfo:
+        parse_api_keys(raw)
+    # Errors name the entry position, never the key itself
+    assert "entry 1" in str(excinfo.value)
+
+
+def test_key_registry_lookup():
+    registry = KeyRegistry([("a", 1, 1), ("b", 1, 1)])
+
+    assert len(registry) == 2
+    assert registry.lookup("a") is not registry.lookup("b")
+    assert registry.lookup("a") is registry.lookup("a")
+    assert registry.lookup("c") is None
+    assert registry.lookup("") is None
+
+
+@pytest.mark.parametrize("name, value", [
+    ("RATE_LIMIT_PER_SECOND", "-1"),
+    ("RATE_LIMIT_BURST", "0"),
+    ("MAX_CONCURRENT_REQUESTS", "0"),
+    ("MAX_QUEUED_REQUESTS", "-1"),
+    ("MAX_CONCURRENT_STREAMS", "0"),
+    ("QUEUE_TIMEOUT_SECONDS", "soon"),
+    ("API_KEYS", "a:x"),
+])
+def test_load_limits_rejects_bad_config(limits, name, value):
+    with pytest.raises(ValueError):
+        limits(API_KEY="k", **{name: value})
+
+
+# =========================
+# LOAD SHEDDER
+# =========================
+def test_load_shedder_sheds_when_queue_is_full():
+    shedder = LoadShedder(max_concurrent=1, max_queued=0, queue_timeout=5)
+
+    assert shedder.acquire()
+    assert not shedder.acquire()
+    shedder.release()
+    assert shedder.acquire()
+
+
+def test_load_shedder_queued_request_gets_released_slot():
+    shedder = LoadShedder(max_concurrent=1, max_queued=1, queue_timeout=5)
+    assert shedder.acquire()
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(shedder.acquire()))
+    waiter.start()
+    while shedder.waiting == 0:
+        pass
+
+    # The only queue position is taken, so this one is shed at once
+    assert not shedder.acquire()
+
+    shedder.release()
+    waiter.join(timeout=5)
+    assert results == [True]
+
+
+def test_load_shedder_queue_timeout():
+    shedder = LoadShedder(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+    assert shedder.acquire()
+
+    assert not shedder.acquire()
+    assert shedder.waiting == 0
+
+
+# =========================
+# DECORATOR
+# =========================
+def test_require_api_key_rejects_missing_and_unknown_keys(limits, client):
+    limits(API_KEYS="good")
+
+    assert client.get("/protected").status_code == 401
+    assert client.get("/protected", headers={"X-API-Key": "bad"}).status_code == 401
+    assert client.get("/protected", headers={"X-API-Key": "good"}).status_code == 200
+
+
+def test_require_api_key_rate_limits_with_retry_after(limits, client):
+    limits(API_KEYS="slow:0.5:1")
+    headers = {"X-API-Key": "slow"}
+
+    assert client.get("/protected", headers=headers).status_code == 200
+    response = client.get("/protected", headers=headers)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_require_api_key_shed_request_keeps_quota(limits, client):
+    limits(API_KEYS="once:0:1", MAX_CONCURRENT_REQUESTS=1, MAX_QUEUED_REQUESTS=0)
+    headers = {"X-API-Key": "once"}
+    shedder = auth.get_load_shedder()
+
+    assert shedder.acquire()
+    try:
+        assert client.get("/protected", headers=headers).status_code == 503
+    finally:
+        shedder.release()
+
+    # The shed request did not spend the key's only token
+    assert client.get("/protected", headers=headers).status_code == 200
+    assert client.get("/protected", headers=headers).status_code == 429
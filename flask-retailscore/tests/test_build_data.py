@@ -0,0 +1,196 @@
+import json
+import math
+import sys
+
+import numpy as np
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+import build_data
+from build_data import (
+    MISSING_INT,
+    BuildReport,
+    build_columns,
+    parse_coordinates,
+    parse_density,
+    parse_int,
+    parse_pincode,
+)
+
+HEADER = [
+    "pincode", "places", "total_population", "male_population", "female_population",
+    "coordinates", "shop_size", "Competitors", "employee_count", "Stoks availabity",
+    "population_density", "area_type",
+]
+
+
+def make_row(pincode=534411, **overrides):
+    row = dict(zip(HEADER, [
+        pincode, "Ananthapallli", 21749, 10926, 10823,
+        "16.968425, 81.446589", "Small", 2, 29, 652,
+        "340 per sq km", "Urban",
+    ]))
+    row.update(overrides)
+    return row
+
+
+# =========================
+# PARSERS
+# =========================
+@pytest.mark.parametrize("value, expected", [
+    (534411, 534411),
+    (534411.0, 534411),
+    (" 534411 ", 534411),
+    ("034411", None),
+    ("53441", None),
+    ("5344111", None),
+    ("53441a", None),
+    (534411.5, None),
+    (None, None),
+])
+def test_parse_pincode(value, expected):
+    assert parse_pincode(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("340 per sq km", 340.0),
+    ("1,200 per sq km", 1200.0),
+    ("12.5 PER SQ KM", 12.5),
+    ("1,200", 1200.0),
+    (340, 340.0),
+    (" per sq km", None),
+    ("", None),
+    (None, None),
+    ("about 300", None),
+])
+def test_parse_density(value, expected):
+    assert parse_density(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("16.968425, 81.446589", (16.968425, 81.446589)),
+    ("-33.8,151.2", (-33.8, 151.2)),
+    ("16.96", None),
+    ("91.0, 10.0", None),
+    ("10.0, 181.0", None),
+    ("north, east", None),
+    (None, None),
+])
+def test_parse_coordinates(value, expected):
+    assert parse_coordinates(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (29, 29),
+    (29.0, 29),
+    ("29", 29),
+    (29.5, None),
+    ("", None),
+    (None, None),
+    ("many", None),
+])
+def test_parse_int(value, expected):
+    assert parse_int(value) == expected
+
+
+# =========================
+# BUILD
+# =========================
+def test_build_columns_rejects_malformed_and_duplicate_pincodes():
+    report = BuildReport()
+    rows = [
+        (2, make_row(534411)),
+        (3, make_row("bad")),
+        (4, make_row(534411)),
+        (5, make_row(534331)),
+    ]
+
+    arrays = build_columns(iter(rows), report)
+
+    assert arrays["pincode"].tolist() == [534411, 534331]
+    assert report.rows_read == 4
+    assert report.rows_written == 2
+    assert report.rejected["malformed_pincode"] == [(3, "bad")]
+    assert report.rejected["duplicate_pincode"] == [(4, 534411)]
+
+
+def test_build_columns_types_and_missing_values():
+    report = BuildReport()
+    rows = [
+        (2, make_row(534411)),
+        (3, make_row(534331, population_density=" per sq km", coordinates=None,
+                     total_population=None, places=None, area_type="")),
+    ]
+
+    arrays = build_columns(iter(rows), report)
+
+    assert arrays["pincode"].dtype == np.int64
+    assert arrays["population_density"].dtype == np.float64
+    assert arrays["latitude"].tolist()[0] == 16.968425
+    assert arrays["longitude"].tolist()[0] == 81.446589
+    assert arrays["stock_availability"].tolist() == [652, 652]
+
+    assert math.isnan(arrays["population_density"][1])
+    assert math.isnan(arrays["latitude"][1])
+    assert arrays["total_population"][1] == MISSING_INT
+    assert arrays["places"][1] == ""
+    assert arrays["area_type"][1] == ""
+
+    summary = report.summary()["missing"]
+    for column in ("population_density", "coordinates", "total_population", "places", "area_type"):
+        assert summary[column] == 1
+
+
+def test_build_columns_reports_unknown_area_type():
+    report = BuildReport()
+
+    build_columns(iter([(2, make_row(area_type="Metro"))]), report)
+
+    assert report.missing["area_type"] == [(2, 534411)]
+
+
+def test_build_end_to_end(tmp_path, monkeypatch):
+    source = tmp_path / "source.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in [make_row(534411), make_row(534411), make_row(534331, area_type="Rural")]:
+        sheet.append([row[name] for name in HEADER])
+    sheet.append([None] * len(HEADER))
+    workbook.save(source)
+
+    output = tmp_path / "data.npz"
+    manifest_path = tmp_path / "manifest.json"
+    monkeypatch.setattr(sys, "argv", [
+        "build_data.py", "--source", str(source),
+        "--output", str(output), "--manifest", str(manifest_path),
+    ])
+    build_data.main()
+
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest["sha256"] == build_data.file_sha256(output)
+    assert manifest["rows"] == 2
+    assert manifest["report"]["rejected"]["duplicate_pincode"] == 1
+
+    with np.load(output, allow_pickle=False) as data:
+        assert data["pincode"].tolist() == [534411, 534331]
+        assert data["area_type"].tolist() == ["Urban", "Rural"]
+
+
+def test_build_strict_fails_on_rejected_rows(tmp_path, monkeypatch):
+    source = tmp_path / "source.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.append(HEADER)
+    workbook.active.append([make_row("bad")[name] for name in HEADER])
+    workbook.save(source)
+
+    output = tmp_path / "data.npz"
+    monkeypatch.setattr(sys, "argv", [
+        "build_data.py", "--strict", "--source", str(source),
+        "--output", str(output), "--manifest", str(tmp_path / "manifest.json"),
+    ])
+
+    with pytest.raises(SystemExit):
+        build_data.main()
+    assert not output.exists()
@@ -0,0 +1,70 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from utils import predictor
+from utils.predictor import (
+    INCOMPLETE_DATA_ERROR,
+    MANIFEST_PATH,
+    DATA_PATH,
+    load_retail_data,
+    predict_store_success,
+)
+
+PAYLOAD = {
+    "area_type": "Urban",
+    "competitors": 2,
+    "employee_count": 29,
+    "stock_availability": 636,
+    "shoe_size": "Small",
+}
+
+
+def test_load_retail_data_matches_manifest():
+    df, manifest = load_retail_data()
+
+    assert len(df) == manifest["rows"]
+    assert {name: str(df[name].to_numpy().dtype) for name in ("pincode", "population_density", "latitude")} == {
+        "pincode": "int64",
+        "population_density": "float64",
+        "latitude": "float64",
+    }
+
+
+def test_load_retail_data_rejects_hash_mismatch(tmp_path):
+    manifest = json.loads(open(MANIFEST_PATH).read())
+    manifest["sha256"] = "0" * 64
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+    data_path = tmp_path / "data.npz"
+    shutil.copy(DATA_PATH, data_path)
+
+    with pytest.raises(ValueError, match="manifest hash"):
+        load_retail_data(str(data_path), str(manifest_path))
+
+
+def test_predict_known_pincode():
+    result = predict_store_success(dict(PAYLOAD, pincode=534411))
+
+    assert result["store_score"] == 654.89
+    assert result["demographics"]["population_density"] == 340.0
+    assert result["demographics"]["coordinates"] == "16.968425, 81.446589"
+    assert result["demographics"]["latitude"] == 16.968425
+
+
+def test_predict_unknown_pincode():
+    assert predict_store_success(dict(PAYLOAD, pincode=1)) == {"error": "Invalid pincode"}
+
+
+def test_predict_incomplete_population():
+    assert predict_store_success(dict(PAYLOAD, pincode=828112)) == {"error": INCOMPLETE_DATA_ERROR}
+
+
+def test_predict_missing_density_is_not_scored(monkeypatch):
+    df = predictor.df.copy()
+    df.loc[df["pincode"] == 534411, "population_density"] = np.nan
+    monkeypatch.setattr(predictor, "df", df)
+
+    assert predict_store_success(dict(PAYLOAD, pincode=534411)) == {"error": INCOMPLETE_DATA_ERROR}
@@ -0,0 +1,149 @@
+import json
+import os
+
+import pytest
+
+from app import app
+from utils import predictor
+from utils.predictor import iter_store_success, predict_store_success, scale_store_inputs
+
+HEADERS = {"X-API-Key": "test-key"}
+
+STORE_INPUTS = [
+    {"competitors": 2, "employee_count": 29, "stock_availability": 636, "shoe_size": "Small"},
+    # competitors > 15 exercises the competition business rule
+    {"competitors": 20, "employee_count": 5, "stock_availability": 100, "shoe_size": 700},
+]
+
+
+@pytest.fixture
+def client(limits):
+    limits(API_KEYS="test-key:1000:1000")
+    return app.test_client()
+
+
+def stream_lines(response):
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    response.close()
+    return lines[:-1], lines[-1]
+
+
+def assert_stream_matches_single_predictions(area_type, store_inputs, pincode_prefix):
+    inputs = dict(store_inputs, area_type=area_type, pincode_prefix=pincode_prefix)
+    expected_rows = predictor.select_locations(area_type, pincode_prefix)
+
+    streamed = []
+    skipped = 0
+    for results, chunk_skipped in iter_store_success(inputs, scale_store_inputs(inputs), chunk_size=37):
+        streamed.extend(results)
+        skipped += chunk_skipped
+
+    assert len(streamed) + skipped == len(expected_rows)
+    for result in streamed:
+        assert result == predict_store_success(dict(inputs, pincode=result["pincode"]))
+
+
+# =========================
+# BATCH == SINGLE SCORING
+# =========================
+@pytest.mark.parametrize("store_inputs", STORE_INPUTS)
+@pytest.mark.parametrize("area_type", ["Urban", "Semi-Urban", "Rural"])
+@pytest.mark.parametrize("pincode_prefix", ["53", "82"])
+def test_streamed_scores_match_single_predictions(area_type, store_inputs, pincode_prefix):
+    assert_stream_matches_single_predictions(area_type, store_inputs, pincode_prefix)
+
+
+@pytest.mark.skipif(not os.getenv("FULL_EQUIVALENCE"), reason="set FULL_EQUIVALENCE=1 to check every pincode (~1 min)")
+@pytest.mark.parametrize("area_type", ["Urban", "Semi-Urban", "Rural"])
+def test_streamed_scores_match_single_predictions_full(area_type):
+    assert_stream_matches_single_predictions(area_type, STORE_INPUTS[1], None)
+
+
+# =========================
+# ENDPOINT
+# =========================
+def test_stream_endpoint_emits_results_and_trailer(client):
+    body = dict(STORE_INPUTS[0], area_type="Rural", pincode_prefix="82", chunk_size=10)
+
+    response = client.post("/api/predict/stream", json=body, headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    results, trailer = stream_lines(response)
+    assert trailer["status"] == "complete"
+    assert trailer["count"] == len(results) > 0
+    # 828126 is in this prefix and has incomplete demographic data
+    assert trailer["skipped"] >= 1
+    assert 828126 not in {result["pincode"] for result in results}
+
+
+def test_stream_endpoint_requires_api_key(client):
+    body = dict(STORE_INPUTS[0], area_type="Rural")
+
+    assert client.post("/api/predict/stream", json=body).status_code == 401
+
+
+@pytest.mark.parametrize("overrides, error", [
+    ({"area_type": "Metro"}, "Invalid area_type"),
+    ({"competitors": "abc"}, "competitors must be a number"),
+    ({"employee_count": True}, "employee_count must be a number"),
+    ({"stock_availability": None}, "stock_availability must be a number"),
+    ({"shoe_size": "Huge"}, "shoe_size must be"),
+    ({"shoe_size": [1]}, "shoe_size must be"),
+    ({"chunk_size": "abc"}, "chunk_size must be between"),
+    ({"chunk_size": True}, "chunk_size must be between"),
+    ({"chunk_size": 0}, "chunk_size must be between"),
+    ({"chunk_size": 1001}, "chunk_size must be between"),
+])
+def test_stream_endpoint_rejects_bad_input_before_streaming(client, overrides, error):
+    body = dict(dict(STORE_INPUTS[0], area_type="Rural"), **overrides)
+
+    response = client.post("/api/predict/stream", json=body, headers=HEADERS)
+
+    assert response.status_code == 400
+    assert error in response.get_json()["error"]
+
+
+def test_stream_endpoint_rejects_missing_field(client):
+    body = dict(STORE_INPUTS[0], area_type="Rural")
+    del body["shoe_size"]
+
+    response = client.post("/api/predict/stream", json=body, headers=HEADERS)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Missing field: shoe_size"}
+
+
+@pytest.mark.parametrize("raw_body", ["null", "[1, 2]", "{not json"])
+def test_stream_endpoint_rejects_non_object_body(client, raw_body):
+    response = client.post(
+        "/api/predict/stream",
+        data=raw_body,
+        content_type="application/json",
+        headers=HEADERS
+    )
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object"}
+
+
+def test_open_stream_does_not_block_predictions(limits):
+    limits(API_KEYS="test-key:1000:1000", MAX_CONCURRENT_REQUESTS=1, MAX_QUEUED_REQUESTS=0, MAX_CONCURRENT_STREAMS=1)
+    client = app.test_client()
+    body = dict(STORE_INPUTS[0], area_type="Urban")
+
+    # Not read yet, like a slow NDJSON consumer
+    stream = client.post("/api/predict/stream", json=body, headers=HEADERS, buffered=False)
+    try:
+        assert stream.status_code == 200
+        predict = client.post("/api/predict", json=dict(body, pincode=534411), headers=HEADERS)
+        assert predict.status_code == 200
+
+        # Streams have their own, separately bounded slots
+        assert client.post("/api/predict/stream", json=body, headers=HEADERS).status_code == 503
+    finally:
+        stream.close()
+
+    again = client.post("/api/predict/stream", json=dict(body, pincode_prefix="53"), headers=HEADERS)
+    assert again.status_code == 200
+    again.close()
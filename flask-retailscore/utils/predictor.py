@@ -1,4 +1,6 @@
 import os
+import json
+import hashlib
 import logging
 import pandas as pd
 import numpy as np
@@ -19,15 +21,34 @@ logger = logging.getLogger(__name__)
 # =========================
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-DATA_PATH = os.path.join(BASE_DIR, "data", "retail_data_with_area_type.csv")
+DATA_PATH = os.path.join(BASE_DIR, "data", "retail_data.npz")
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "retail_data.manifest.json")
 MODEL_DIR = os.path.join(BASE_DIR, "Pikels")
 
 # =========================
 # LOAD DATA (ONCE)
 # =========================
+# Built by build_data.py: typed numeric columns, verified against the
+# manifest hash so a stale or corrupted artifact fails loudly at startup
+def load_retail_data(data_path=DATA_PATH, manifest_path=MANIFEST_PATH):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    digest = hashlib.sha256()
+    with open(data_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+
+    if digest.hexdigest() != manifest["sha256"]:
+        raise ValueError(f"{data_path} does not match manifest hash, rebuild with build_data.py")
+
+    with np.load(data_path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files}), manifest
+
+
 try:
-    df = pd.read_csv(DATA_PATH)
-    logger.info("Retail data loaded successfully")
+    df, data_manifest = load_retail_data()
+    logger.info(f"Retail data loaded successfully ({len(df)} rows, sha256 {data_manifest['sha256'][:12]})")
 except Exception as e:
     logger.error("Failed to load retail data")
     raise e
@@ -78,17 +99,19 @@ def scale_to_1000(raw_value, min_expected=200, max_expected=1200):
 # =========================
 # SHOP SIZE NORMALIZER
 # =========================
+SHOP_SIZES = {
+    "Small": 100,
+    "Medium": 400,
+    "Large": 700
+}
+
+
 def normalize_shop_size(shop_size):
     """
     Dropdown / API safe adapter
     """
     if isinstance(shop_size, str):
-        mapping = {
-            "Small": 100,
-            "Medium": 400,
-            "Large": 700
-        }
-        return mapping.get(shop_size, 100)
+        return SHOP_SIZES.get(shop_size, 100)
     return shop_size
 
 # =========================
@@ -100,25 +123,41 @@ def encode_area_type(area_type):
 # =========================
 # PINCODE LOOKUP
 # =========================
+INCOMPLETE_DATA_ERROR = "Incomplete demographic data for pincode"
+
+
 def get_pincode_data(pincode):
     record = df[df["pincode"] == pincode]
 
     if record.empty:
         return None
 
-    density_raw = record.iloc[0]["population_density"]
-    try:
-        density = float(str(density_raw).replace(",", "").split()[0])
-    except Exception:
-        density = 0.0
+    return pincode_record(pincode, record.iloc[0])
+
+
+def pincode_record(pincode, row):
+    """
+    Converts one artifact row to the demographics dict used by the API
+    """
+    # build_data.py stores missing integers as -1 and missing floats as NaN;
+    # both feed the models, so such pincodes are reported, never scored
+    density = float(row["population_density"])
+    if min(row["total_population"], row["male_population"], row["female_population"]) < 0 or np.isnan(density):
+        logger.warning(f"Pincode {pincode} has incomplete demographic data")
+        return None
+
+    latitude, longitude = float(row["latitude"]), float(row["longitude"])
+    has_coordinates = not (np.isnan(latitude) or np.isnan(longitude))
 
     return {
-        "place": record.iloc[0]["places"],
-        "total_population": int(record.iloc[0]["total_population"]),
-        "male_population": int(record.iloc[0]["male_population"]),
-        "female_population": int(record.iloc[0]["female_population"]),
+        "place": str(row["places"]),
+        "total_population": int(row["total_population"]),
+        "male_population": int(row["male_population"]),
+        "female_population": int(row["female_population"]),
         "population_density": density,
-        "coordinates": record.iloc[0]["coordinates"]
+        "coordinates": f"{latitude}, {longitude}" if has_coordinates else None,
+        "latitude": latitude if has_coordinates else None,
+        "longitude": longitude if has_coordinates else None
     }
 
 # =========================
@@ -219,6 +258,9 @@ def predict_store_success(payload):
     pincode_data = get_pincode_data(payload["pincode"])
 
     if not pincode_data:
+        # Known pincode whose source row is missing population or density
+        if (df["pincode"] == payload["pincode"]).any():
+            return {"error": INCOMPLETE_DATA_ERROR}
         return {"error": "Invalid pincode"}
 
     market_score = calculate_market_score(
@@ -240,3 +282,130 @@ def predict_store_success(payload):
         "store_score": store_score,
         "demographics": pincode_data
     }
+
+# =========================
+# BATCH / STREAMING PREDICT
+# =========================
+DEFAULT_CHUNK_SIZE = 100
+
+
+def select_locations(area_type, pincode_prefix=None):
+    """
+    Rows of the retail data for an area type, optionally limited to
+    pincodes starting with pincode_prefix (e.g. "53" for one postal circle)
+    """
+    mask = df["area_type"] == area_type
+    if pincode_prefix:
+        mask &= df["pincode"].astype(str).str.startswith(str(pincode_prefix))
+    return df[mask]
+
+
+def scale_store_inputs(inputs):
+    """
+    Runs the store scaler once for the shop inputs shared by every
+    location of a batch; returns the 4 scaled store features
+    """
+    store_features = np.array([[
+        normalize_shop_size(inputs["shoe_size"]),
+        inputs["stock_availability"],
+        inputs["employee_count"],
+        inputs["competitors"]
+    ]], dtype=np.float32)
+
+    return store_scaler_session.run(
+        [store_scaler_session.get_outputs()[0].name],
+        {store_scaler_session.get_inputs()[0].name: store_features}
+    )[0][0]
+
+
+def score_locations(records, inputs, scaled_store_features):
+    """
+    Scores a chunk of rows in one ONNX call per model.
+
+    Produces the same values as predict_store_success for each row,
+    using inputs["area_type"] and the store inputs for every location.
+    scaled_store_features comes from scale_store_inputs(inputs).
+    Rows with incomplete population data are skipped.
+
+    Returns:
+        (results, skipped) where skipped counts the rows left out
+    """
+    area_type = inputs["area_type"]
+    area_encoded = encode_area_type(area_type)
+
+    locations = []
+    for row in records.to_dict("records"):
+        pincode_data = pincode_record(row["pincode"], row)
+        if pincode_data:
+            locations.append((int(row["pincode"]), pincode_data))
+
+    skipped = len(records) - len(locations)
+
+    if not locations:
+        return [], skipped
+
+    market_input = np.array([[
+        data["total_population"],
+        data["male_population"],
+        data["female_population"],
+        data["population_density"],
+        area_encoded
+    ] for _, data in locations], dtype=np.float32)
+
+    market_scaled = market_scaler_session.run(
+        [market_scaler_session.get_outputs()[0].name],
+        {market_scaler_session.get_inputs()[0].name: market_input}
+    )[0]
+    market_scores = [round(float(np.mean(row)), 2) for row in market_scaled]
+
+    # Column order must match MODEL_FEATURES
+    final_features = np.array([[
+        data["total_population"],
+        data["male_population"],
+        data["population_density"],
+        area_encoded,
+        scaled_store_features[0],
+        scaled_store_features[1],
+        scaled_store_features[2],
+        scaled_store_features[3],
+        market_score
+    ] for (_, data), market_score in zip(locations, market_scores)], dtype=np.float32)
+
+    raw_predictions = store_model_session.run(
+        [store_model_session.get_outputs()[0].name],
+        {store_model_session.get_inputs()[0].name: final_features}
+    )[0][:, 0]
+
+    results = []
+    for (pincode, data), market_score, raw_prediction in zip(locations, market_scores, raw_predictions):
+        # Same business rules as calculate_store_score
+        if inputs["competitors"] > 15:
+            raw_prediction *= 0.90
+
+        if area_type == "Urban":
+            raw_prediction *= 1.08
+
+        results.append({
+            "pincode": pincode,
+            "area_type": area_type,
+            "market_score": market_score,
+            "store_score": scale_to_1000(raw_prediction),
+            "demographics": data
+        })
+
+    return results, skipped
+
+
+def iter_store_success(payload, scaled_store_features, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily yields (results, skipped) per chunk, as returned by
+    score_locations.
+
+    Nothing is scored until the consumer asks for the next chunk, so a
+    caller that stops iterating (e.g. the client disconnected) stops
+    the computation as well.
+    """
+    records = select_locations(payload["area_type"], payload.get("pincode_prefix"))
+
+    for start in range(0, len(records), chunk_size):
+        yield score_locations(records.iloc[start:start + chunk_size], payload, scaled_store_features)